@@ -1,5 +1,8 @@
 import os
+import re
+import json
 import time
+import threading
 import requests
 from flask import Flask, render_template, request, jsonify
 from dotenv import load_dotenv
@@ -32,6 +35,212 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Safety settings shared by all generation profiles unless a profile overrides them
+DEFAULT_SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+# Values used for any optional field a profile leaves out.
+# These match the settings chat() has always used.
+PROFILE_DEFAULTS = {
+    'max_output_tokens': 4096,
+    'temperature': 0.4,
+    'top_p': 1,
+    'top_k': 32,
+    'file_search': {},
+    'safety_settings': DEFAULT_SAFETY_SETTINGS
+}
+
+# Built-in generation profiles, used when GENERATION_PROFILES_FILE is not set
+DEFAULT_GENERATION_PROFILES = {
+    'fast': {
+        'model': 'gemini-2.5-flash-lite',
+        'max_output_tokens': 1024,
+        'temperature': 0.2
+    },
+    'balanced': {
+        'model': 'gemini-2.5-flash'
+    },
+    'thorough': {
+        'model': 'gemini-2.5-pro',
+        'max_output_tokens': 8192
+    }
+}
+
+# Settings for the automatic profile router (used when a request asks for "auto")
+DEFAULT_AUTO_ROUTE_SHORT_QUERY_WORDS = 12
+DEFAULT_AUTO_ROUTE_LONG_QUERY_WORDS = 60
+# Queries asking for comparison or analysis are routed like long queries
+AUTO_ROUTE_LONG_QUERY_PATTERN = re.compile(
+    r'\b(?:compar(?:e|es|ed|ing|ison|isons)'
+    r'|summar(?:y|ies|ize|izes|ized|izing|ise|ises|ised|ising)'
+    r'|analy(?:sis|ses|ze|zes|zed|zing|se|sed|sing)'
+    r'|differen(?:ce|ces|t|tly)'
+    r'|explain why|step by step|in detail|pros and cons)\b',
+    re.IGNORECASE
+)
+
+def load_auto_route_thresholds():
+    """Load the auto router word-count thresholds from the environment, falling back to the defaults"""
+    try:
+        short_words = int(os.getenv('AUTO_ROUTE_SHORT_QUERY_WORDS', DEFAULT_AUTO_ROUTE_SHORT_QUERY_WORDS))
+        long_words = int(os.getenv('AUTO_ROUTE_LONG_QUERY_WORDS', DEFAULT_AUTO_ROUTE_LONG_QUERY_WORDS))
+        if short_words < 0 or short_words >= long_words:
+            raise ValueError('AUTO_ROUTE_SHORT_QUERY_WORDS must be non-negative and below AUTO_ROUTE_LONG_QUERY_WORDS')
+        return short_words, long_words
+    except Exception as e:
+        print(f"Error loading auto route thresholds: {e}")
+        return DEFAULT_AUTO_ROUTE_SHORT_QUERY_WORDS, DEFAULT_AUTO_ROUTE_LONG_QUERY_WORDS
+
+AUTO_ROUTE_SHORT_QUERY_WORDS, AUTO_ROUTE_LONG_QUERY_WORDS = load_auto_route_thresholds()
+
+# Expected types for optional profile fields
+PROFILE_FIELD_TYPES = {
+    'max_output_tokens': int,
+    'temperature': (int, float),
+    'top_p': (int, float),
+    'top_k': int,
+    'file_search': dict,
+    'safety_settings': list
+}
+
+# Allowed ranges for numeric profile fields as (minimum, maximum); None means unbounded
+PROFILE_FIELD_RANGES = {
+    'max_output_tokens': (1, None),
+    'temperature': (0, None),
+    'top_p': (0, 1),
+    'top_k': (1, None)
+}
+
+def validate_generation_profile(name, profile):
+    """Raise ValueError if a generation profile is malformed"""
+    if name == 'auto':
+        raise ValueError('"auto" is reserved for the automatic router and cannot be a profile name')
+    if not isinstance(profile, dict):
+        raise ValueError(f'profile "{name}" must be a JSON object')
+    if not isinstance(profile.get('model'), str) or not profile['model']:
+        raise ValueError(f'profile "{name}" is missing a model')
+    unknown_fields = set(profile) - set(PROFILE_FIELD_TYPES) - {'model'}
+    if unknown_fields:
+        raise ValueError(f'profile "{name}" has unknown fields: {", ".join(sorted(unknown_fields))}')
+    for field, expected_type in PROFILE_FIELD_TYPES.items():
+        if field not in profile:
+            continue
+        value = profile[field]
+        # bool is a subclass of int, so reject it explicitly for numeric fields
+        if isinstance(value, bool) or not isinstance(value, expected_type):
+            raise ValueError(f'profile "{name}" has an invalid {field}: {value!r}')
+        minimum, maximum = PROFILE_FIELD_RANGES.get(field, (None, None))
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(f'profile "{name}" has an out of range {field}: {value!r}')
+
+def load_generation_profiles():
+    """Load generation profiles from GENERATION_PROFILES_FILE, falling back to the defaults"""
+    profiles = DEFAULT_GENERATION_PROFILES
+    profiles_file = os.getenv('GENERATION_PROFILES_FILE')
+    if profiles_file:
+        try:
+            with open(profiles_file) as f:
+                loaded_profiles = json.load(f)
+            if not isinstance(loaded_profiles, dict) or not loaded_profiles:
+                raise ValueError('profiles file must contain a non-empty JSON object')
+            for name, profile in loaded_profiles.items():
+                validate_generation_profile(name, profile)
+            profiles = loaded_profiles
+        except Exception as e:
+            print(f"Error loading generation profiles from {profiles_file}: {e}")
+
+    # Fill in every optional field so callers never need their own fallbacks
+    return {name: {**PROFILE_DEFAULTS, **profile} for name, profile in profiles.items()}
+
+GENERATION_PROFILES = load_generation_profiles()
+
+DEFAULT_PROFILE = os.getenv('DEFAULT_GENERATION_PROFILE', 'balanced')
+if DEFAULT_PROFILE not in GENERATION_PROFILES:
+    fallback_profile = next(iter(GENERATION_PROFILES))
+    print(f"Warning: default generation profile '{DEFAULT_PROFILE}' is not defined, using '{fallback_profile}'")
+    DEFAULT_PROFILE = fallback_profile
+
+def load_auto_route_profile(setting, default_name):
+    """Load the profile the auto router uses for a query class, falling back to the default profile"""
+    profile_name = os.getenv(setting, default_name)
+    if profile_name not in GENERATION_PROFILES:
+        print(f"Warning: {setting} profile '{profile_name}' is not defined, auto routing will use '{DEFAULT_PROFILE}'")
+        return DEFAULT_PROFILE
+    return profile_name
+
+AUTO_ROUTE_SHORT_PROFILE = load_auto_route_profile('AUTO_ROUTE_SHORT_PROFILE', 'fast')
+AUTO_ROUTE_LONG_PROFILE = load_auto_route_profile('AUTO_ROUTE_LONG_PROFILE', 'thorough')
+
+# Per-profile latency and token usage, kept in memory since the app was started
+profile_stats = {}
+profile_stats_lock = threading.Lock()
+
+def route_profile(query):
+    """Pick a generation profile for a query based on its length and wording"""
+    word_count = len(query.split())
+
+    if word_count >= AUTO_ROUTE_LONG_QUERY_WORDS or AUTO_ROUTE_LONG_QUERY_PATTERN.search(query):
+        return AUTO_ROUTE_LONG_PROFILE
+    if word_count <= AUTO_ROUTE_SHORT_QUERY_WORDS:
+        return AUTO_ROUTE_SHORT_PROFILE
+    return DEFAULT_PROFILE
+
+def resolve_profile(requested_profile, query):
+    """Return the profile name to use for a chat request, or None if it is unknown"""
+    if not requested_profile:
+        return DEFAULT_PROFILE
+    if requested_profile == 'auto':
+        return route_profile(query)
+    if requested_profile in GENERATION_PROFILES:
+        return requested_profile
+    return None
+
+def record_profile_usage(profile_name, latency_ms, usage_metadata, success):
+    """Accumulate latency and token usage for a generation profile"""
+    with profile_stats_lock:
+        stats = profile_stats.setdefault(profile_name, {
+            'requests': 0,
+            'successes': 0,
+            'usage_samples': 0,
+            'errors': 0,
+            'total_latency_ms': 0,
+            'total_token_count': 0,
+            'prompt_token_count': 0,
+            'candidates_token_count': 0
+        })
+        stats['requests'] += 1
+        if not success:
+            # Failed calls are counted separately so they don't skew latency or token averages
+            stats['errors'] += 1
+            return
+        stats['successes'] += 1
+        stats['total_latency_ms'] += latency_ms
+        # Responses without usageMetadata don't count towards the token averages
+        if usage_metadata:
+            stats['usage_samples'] += 1
+            for key in ('total_token_count', 'prompt_token_count', 'candidates_token_count'):
+                stats[key] += usage_metadata.get(key, 0)
+
+def get_profile_stats(profile_name):
+    """Return accumulated stats for a profile, with averages over successful calls"""
+    with profile_stats_lock:
+        stats = dict(profile_stats.get(profile_name, {}))
+
+    if stats.get('requests'):
+        stats['error_rate'] = round(stats['errors'] / stats['requests'], 3)
+    successes = stats.get('successes', 0)
+    if successes:
+        stats['avg_latency_ms'] = round(stats['total_latency_ms'] / successes, 1)
+    usage_samples = stats.get('usage_samples', 0)
+    if usage_samples:
+        stats['avg_total_token_count'] = round(stats['total_token_count'] / usage_samples, 1)
+        stats['avg_candidates_token_count'] = round(stats['candidates_token_count'] / usage_samples, 1)
+    return stats
+
 def validate_api_key(api_key):
     """Validate the provided API key by making a simple request"""
     try:
@@ -145,7 +354,11 @@ def list_file_search_stores():
         response = requests.get(f"{url}?key={api_key}")
 
         if response.status_code == 200:
-            response_data = response.json()
+            try:
+                response_data = response.json()
+            except ValueError:
+                record_profile_usage(profile_name, latency_ms, {}, False)
+                return jsonify({'error': f'API returned an invalid response: {response.text}'})
             stores_data = response_data.get('fileSearchStores', [])
 
             stores = []
@@ -445,45 +658,55 @@ def chat():
         if not query:
             return jsonify({'error': 'Query is required'})
 
+        profile_name = resolve_profile(data.get('profile', ''), query)
+        if not profile_name:
+            return jsonify({'error': f"Unknown generation profile: {data.get('profile')}"})
+        profile = GENERATION_PROFILES[profile_name]
+
         # Get API key
         api_key = genai._client.api_key if hasattr(genai, '_client') and genai._client else os.getenv('GEMINI_API_KEY')
         if not api_key:
             return jsonify({'error': 'API key not configured'})
 
         # Prepare the request payload
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}"
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{profile['model']}:generateContent?key={api_key}"
 
         payload = {
             "contents": [{
                 "parts": [{"text": query}]
             }],
             "generationConfig": {
-                "temperature": 0.4,
-                "topP": 1,
-                "topK": 32,
-                "maxOutputTokens": 4096,
+                "temperature": profile['temperature'],
+                "topP": profile['top_p'],
+                "topK": profile['top_k'],
+                "maxOutputTokens": profile['max_output_tokens'],
             },
-            "safetySettings": [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            ]
+            "safetySettings": profile['safety_settings']
         }
 
         # Only add tools if store_names are provided
         if store_names:
+            file_search = dict(profile['file_search'])
+            file_search["fileSearchStoreNames"] = store_names  # Updated to match the actual API parameter name
             payload["tools"] = [{
-                "fileSearch": {
-                    "fileSearchStoreNames": store_names  # Updated to match the actual API parameter name
-                }
+                "fileSearch": file_search
             }]
 
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url, json=payload, headers=headers)
+        start_time = time.perf_counter()
+        try:
+            response = requests.post(url, json=payload, headers=headers)
+        except Exception:
+            record_profile_usage(profile_name, round((time.perf_counter() - start_time) * 1000), {}, False)
+            raise
+        latency_ms = round((time.perf_counter() - start_time) * 1000)
 
         if response.status_code == 200:
-            response_data = response.json()
+            try:
+                response_data = response.json()
+            except ValueError:
+                record_profile_usage(profile_name, latency_ms, {}, False)
+                return jsonify({'error': f'API returned an invalid response: {response.text}'})
 
             # Extract the text response
             response_text = ""
@@ -544,20 +767,41 @@ def chat():
             except (KeyError, TypeError):
                 pass  # Usage metadata not available
 
+            record_profile_usage(profile_name, latency_ms, usage_metadata, True)
+
             result = {
                 'query': query,
                 'response': response_text,
                 'citations': citations,
-                'usage': usage_metadata
+                'usage': usage_metadata,
+                'profile': profile_name,
+                'model': profile['model'],
+                'latency_ms': latency_ms
             }
 
             return jsonify(result)
         else:
+            record_profile_usage(profile_name, latency_ms, {}, False)
             return jsonify({'error': f'API request failed: {response.text}'})
 
     except Exception as e:
         return jsonify({'error': str(e)})
 
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """List generation profiles with their per-profile latency and token usage"""
+    return jsonify({
+        'default_profile': DEFAULT_PROFILE,
+        'profiles': [{
+            'name': name,
+            'model': profile['model'],
+            'max_output_tokens': profile['max_output_tokens'],
+            'temperature': profile['temperature'],
+            'file_search': profile['file_search'],
+            'stats': get_profile_stats(name)
+        } for name, profile in GENERATION_PROFILES.items()]
+    })
+
 @app.route('/api/stores', methods=['GET', 'POST'])
 def manage_stores():
     """Manage File Search stores"""
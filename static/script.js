@@ -57,6 +57,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initial load of stores
     listStores();
+
+    // Initial load of generation profiles
+    listProfiles();
     
     // Direct Upload
     document.getElementById('direct-upload-btn').addEventListener('click', function() {
@@ -241,6 +244,26 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function listProfiles() {
+        fetch('/api/profiles')
+        .then(response => response.json())
+        .then(data => {
+            const queryProfile = document.getElementById('query-profile');
+            queryProfile.innerHTML = `<option value="">Default profile (${data.default_profile})</option>` +
+                '<option value="auto">Auto (route by query)</option>';
+
+            data.profiles.forEach(profile => {
+                const option = document.createElement('option');
+                option.value = profile.name;
+                option.textContent = `${profile.name} (${profile.model}, ${profile.max_output_tokens} tokens)`;
+                queryProfile.appendChild(option);
+            });
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+
     // List uploaded files
     document.getElementById('list-files').addEventListener('click', listUploadedFiles);
 
@@ -431,6 +454,7 @@ document.addEventListener('DOMContentLoaded', function() {
     function sendMessage() {
         const input = document.getElementById('chat-input');
         const queryStore = document.getElementById('query-store');
+        const queryProfile = document.getElementById('query-profile');
         const message = input.value.trim();
 
         if (!message) {
@@ -460,7 +484,8 @@ document.addEventListener('DOMContentLoaded', function() {
             },
             body: JSON.stringify({
                 query: apiMessage,
-                store_names: [queryStore.value]  // Changed to store_names array to match backend
+                store_names: [queryStore.value],  // Changed to store_names array to match backend
+                profile: queryProfile.value
             })
         })
         .then(response => response.json())
@@ -496,6 +521,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Display token usage information if available in a separate section
                 if (data.usage) {
                     const usageInfo = `
+                        <strong>Profile:</strong> ${data.profile || 'Unknown'} (${data.model || 'Unknown'})<br>
                         <strong>Token Usage:</strong><br>
                         Total Token yang Digunakan: ${data.usage.total_token_count || 0}<br>
                         Token Prompt (termasuk PDF): ${data.usage.prompt_token_count || 0}<br>